@@ -4,12 +4,20 @@ import argparse
 import base64
 import gzip
 from pathlib import Path
+from typing import Union
 
 
-def generate_kusto_query_link(cluster: str, database: str, query: str) -> str:
-    """Generate a link to a given Kusto query in Azure Data Explorer."""
+def generate_kusto_query_link(cluster: str, database: str, query: Union[str, bytes]) -> str:
+    """Generate a link to a given Kusto query in Azure Data Explorer.
 
-    encoded_bytes = gzip.compress(query.encode("utf-8"))
+    The query can also be given as UTF-8 encoded bytes, which are compressed as is.
+    """
+
+    if isinstance(query, str):
+        query = query.encode("utf-8")
+
+    # A fixed mtime keeps the gzip header, and so the generated URL, deterministic
+    encoded_bytes = gzip.compress(query, mtime=0)
     encoded_query = base64.b64encode(encoded_bytes).decode("utf-8")
 
     return f"https://dataexplorer.azure.com/clusters/{cluster}/databases/{database}?query={encoded_query}"
@@ -65,8 +73,10 @@ def cli():
         if not kql_path.is_file():
             parser.error(f"KQL file path is not a file: {args.kql_file}")
 
-        with open(args.kql_file, "r") as fp:
-            query = fp.read()
+        # Read the raw bytes, they are compressed without a decode/encode round-trip.
+        # Translate the line endings like text mode does, so CRLF files give the same URL as before.
+        with open(args.kql_file, "rb") as fp:
+            query = fp.read().replace(b"\r\n", b"\n").replace(b"\r", b"\n")
     else:
         query = args.query
 
@@ -78,7 +88,7 @@ def cli():
     if verbose:
         print(f"Cluster: {cluster}")
         print(f"Database: {database}")
-        print(f"Query: {query}")
+        print(f"Query: {query.decode('utf-8', errors='replace') if isinstance(query, bytes) else query}")
         print("")
 
     url = generate_kusto_query_link(cluster, database, query)
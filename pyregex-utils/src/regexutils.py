@@ -1,6 +1,58 @@
 """Utility functions for advanced regex operations with inclusion/exclusion of ranges and patterns."""
 
+import importlib
+import os
 import re
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from itertools import islice
+
+# Module used to compile string patterns: `re` by default, or any module with the same API
+# (e.g. the third-party `regex` module) selected with the REGEXUTILS_BACKEND environment variable.
+_backend_name = os.environ.get("REGEXUTILS_BACKEND", "re")
+
+try:
+    _backend = importlib.import_module(_backend_name)
+except ImportError as error:
+    raise ImportError(f"cannot import the regex backend {_backend_name!r} set in REGEXUTILS_BACKEND") from error
+
+
+@lru_cache(maxsize=512)
+def _compile(pattern: str | bytes | re.Pattern, flags: int = 0) -> re.Pattern:
+    """Compile a regex pattern, caching the result.
+
+    String and bytes patterns are compiled with the configured backend module, while already compiled
+    patterns (from ``re`` or the backend) are returned unchanged. The cache is as large as the internal
+    cache of ``re``, so callers cycling through many patterns do not evict each other's entries early.
+
+    Args:
+        pattern (str, bytes or re.Pattern): The regex pattern to compile.
+        flags (int, optional): Regex flags to use. Defaults to 0.
+
+    Returns:
+        re.Pattern: The compiled pattern.
+
+    Examples:
+        >>> _compile(r'foo')
+        re.compile('foo')
+        >>> _compile(rb'foo')
+        re.compile(b'foo')
+        >>> _compile(r'foo', re.IGNORECASE) is _compile(r'foo', re.IGNORECASE)
+        True
+        >>> compiled = re.compile(r'foo')
+        >>> _compile(compiled) is compiled
+        True
+
+    """
+
+    if isinstance(pattern, (str, bytes)):
+        return _backend.compile(pattern, flags)
+
+    if flags:
+        raise ValueError("cannot process flags argument with a compiled pattern")
+
+    return pattern
 
 
 def _do_ranges_overlap(
@@ -35,11 +87,15 @@ def _do_ranges_overlap(
     return start1 <= end2 - 1 and start2 <= end1 - 1
 
 
-def _simplify_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+def _simplify_ranges(ranges: list[tuple[int, int]], merge_contiguous: bool = True) -> list[tuple[int, int]]:
     """Simplify a list of ranges by merging overlapping or contiguous ranges.
 
     Args:
         ranges (list of tuples): List of (start, end) tuples representing ranges.
+        merge_contiguous (bool, optional): Merge ranges that only touch, like (1, 5) and (5, 10), as well.
+            An empty match at their boundary overlaps neither of them but does overlap the merged range,
+            so they must be kept apart when empty matches are checked against the original ranges.
+            Defaults to True.
 
     Returns:
         list: A simplified list of ranges with no overlaps.
@@ -51,12 +107,16 @@ def _simplify_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
         [(1, 5)]
         >>> _simplify_ranges([(1, 5), (5, 10)])
         [(1, 10)]
+        >>> _simplify_ranges([(1, 5), (5, 10)], merge_contiguous=False)
+        [(1, 5), (5, 10)]
         >>> _simplify_ranges([(1, 5), (4, 6), (8, 10)])
         [(1, 6), (8, 10)]
         >>> _simplify_ranges([(1, 3), (5, 7), (2, 6)])
         [(1, 7)]
         >>> _simplify_ranges([(1, 2), (3, 4), (5, 6)])
         [(1, 2), (3, 4), (5, 6)]
+        >>> _simplify_ranges([(4, 5), (4, 4), (2, 2)])
+        [(2, 2), (4, 5)]
 
     """
 
@@ -68,7 +128,7 @@ def _simplify_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
 
     for current in sorted_ranges[1:]:
         last = simplified[-1]
-        if _do_ranges_overlap(last[0], last[1], current[0], current[1]) or last[1] == current[0]:
+        if current[0] < last[1] or (merge_contiguous and current[0] == last[1]):
             simplified[-1] = (last[0], max(last[1], current[1]))
         else:
             simplified.append(current)
@@ -76,6 +136,153 @@ def _simplify_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
     return simplified
 
 
+def _prepare_ranges(ranges: list[tuple[int, int]], merge_contiguous: bool = True) -> tuple[list[int], list[int]]:
+    """Simplify a list of ranges and split it into sorted lists of starts and ends.
+
+    Args:
+        ranges (list of tuples): List of (start, end) tuples representing ranges.
+        merge_contiguous (bool, optional): Merge ranges that only touch as well, see ``_simplify_ranges``.
+            Defaults to True.
+
+    Returns:
+        tuple: A tuple (starts, ends) of the simplified ranges, both sorted in ascending order.
+
+    Examples:
+        >>> _prepare_ranges([])
+        ([], [])
+        >>> _prepare_ranges([(8, 10), (1, 5), (4, 6)])
+        ([1, 8], [6, 10])
+        >>> _prepare_ranges([(5, 10), (1, 5)], merge_contiguous=False)
+        ([1, 5], [5, 10])
+
+    """
+
+    simplified = _simplify_ranges(ranges, merge_contiguous)
+
+    return [start for start, _ in simplified], [end for _, end in simplified]
+
+
+def _sweep_matches(
+    matches: Iterable[re.Match],
+    starts: list[int],
+    ends: list[int],
+    overlapping: bool = True
+) -> Iterator[re.Match]:
+    """Filter matches by whether they overlap any of the ranges prepared by ``_prepare_ranges``.
+
+    Since the prepared ranges are sorted and disjoint, only the last range starting before the end of
+    a match can overlap it, so it is located with a binary search. The matches of ``finditer`` come in
+    increasing order, so each search resumes from the range of the previous match: the ranges are swept
+    once alongside the matches instead of being searched from the start for every match.
+
+    Args:
+        matches (iterable of re.Match): Matches in the order returned by ``finditer``.
+        starts (list of int): Sorted starts of the prepared ranges.
+        ends (list of int): Sorted ends of the prepared ranges.
+        overlapping (bool, optional): Yield the matches overlapping the ranges if True, or the ones
+            not overlapping them if False. Defaults to True.
+
+    Yields:
+        re.Match: Each of the matches passing the filter.
+
+    Examples:
+        >>> starts, ends = _prepare_ranges([(0, 5)])
+        >>> [match.group(0) for match in _sweep_matches(re.finditer(r'\\w+', 'hello world'), starts, ends)]
+        ['hello']
+        >>> [match.group(0) for match in _sweep_matches(re.finditer(r'\\w+', 'hello world'), starts, ends, False)]
+        ['world']
+
+    """
+
+    index = 0
+
+    for match in matches:
+        # `start()`/`end()` are cheaper than building and unpacking the `span()` tuple
+        index = bisect_right(starts, match.end() - 1, index)
+        if (index > 0 and match.start() <= ends[index - 1] - 1) is overlapping:
+            yield match
+
+
+def _escape_replacement(replacement: str | bytes) -> str | bytes:
+    """Escape the backslashes of a replacement, so ``re.sub`` inserts it literally instead of as a template.
+
+    Args:
+        replacement (str or bytes): The replacement to escape.
+
+    Returns:
+        str or bytes: The escaped replacement, of the same type as ``replacement``.
+
+    Examples:
+        >>> _escape_replacement(r'\\1')
+        '\\\\\\\\1'
+        >>> _escape_replacement(rb'\\1')
+        b'\\\\\\\\1'
+
+    """
+
+    if isinstance(replacement, bytes):
+        return replacement.replace(b"\\", b"\\\\")
+
+    return replacement.replace("\\", "\\\\")
+
+
+def _covers_all_matches(compiled: re.Pattern, string: str, starts: list[int], ends: list[int]) -> bool:
+    """Check if the ranges prepared by ``_prepare_ranges`` overlap every match of a pattern in a string.
+
+    A single range spanning the whole string overlaps every match, except for empty matches at
+    the very start or end of the string.
+
+    Args:
+        compiled (re.Pattern): The compiled regex pattern.
+        string (str): The input string.
+        starts (list of int): Sorted starts of the prepared ranges.
+        ends (list of int): Sorted ends of the prepared ranges.
+
+    Returns:
+        bool: True if every match of the pattern overlaps the ranges, False otherwise.
+
+    Examples:
+        >>> _covers_all_matches(re.compile(r'\\w+'), 'hello world', [0], [11])
+        True
+        >>> _covers_all_matches(re.compile(r'\\w+'), 'hello world', [0], [5])
+        False
+        >>> _covers_all_matches(re.compile(r'\\w*'), 'hello world', [0], [11])
+        False
+
+    """
+
+    if len(starts) != 1 or starts[0] > 0 or ends[0] < len(string):
+        return False
+
+    first_match = compiled.match(string)
+    if first_match is not None and not first_match.end():
+        return False
+
+    return compiled.match(string, len(string)) is None
+
+
+def _iter_within_ranges(
+    string: str,
+    pattern: str | re.Pattern,
+    included_ranges: list[tuple[int, int]],
+    count: int = 0,
+    flags: int = 0
+) -> Iterator[re.Match]:
+    """Yield all occurrences of a pattern in a string, only within specified ranges.
+
+    See ``find_within_ranges`` for a description of the arguments.
+
+    Yields:
+        re.Match: Each of the matches found within the specified ranges.
+
+    """
+
+    starts, ends = _prepare_ranges(included_ranges)
+    matches = _sweep_matches(_compile(pattern, flags).finditer(string), starts, ends, overlapping=True)
+
+    yield from islice(matches, count or None)
+
+
 def find_within_ranges(
     string: str,
     pattern: str | re.Pattern,
@@ -87,7 +294,7 @@ def find_within_ranges(
 
     Args:
         string (str): The input string to search.
-        pattern (str): The regex pattern to search for.
+        pattern (str or re.Pattern): The regex pattern to search for, either as a string or pre-compiled.
         included_ranges (list of tuples): List of (start, end) tuples specifying ranges to include for searching.
         count (int, optional): Maximum number of pattern occurrences to find. Defaults to 0 (find all).
         flags (int, optional): Regex flags to use. Defaults to 0.
@@ -116,24 +323,7 @@ def find_within_ranges(
 
     """
 
-    matches = []
-    found = 0
-
-    included_ranges = _simplify_ranges(included_ranges)
-
-    for match in re.finditer(pattern, string, flags=flags):
-        if count and found >= count:
-            break
-
-        start, end = match.span()
-
-        for in_start, in_end in included_ranges:
-            if _do_ranges_overlap(start, end, in_start, in_end):
-                matches.append(match)
-                found += 1
-                break
-
-    return matches
+    return list(_iter_within_ranges(string, pattern, included_ranges, count, flags))
 
 
 def find_strings_within_ranges(
@@ -147,7 +337,7 @@ def find_strings_within_ranges(
 
     Args:
         string (str): The input string to search.
-        pattern (str): The regex pattern to search for.
+        pattern (str or re.Pattern): The regex pattern to search for, either as a string or pre-compiled.
         included_ranges (list of tuples): List of (start, end) tuples specifying ranges to include for searching.
         count (int, optional): Maximum number of pattern occurrences to find. Defaults to 0 (find all).
         flags (int, optional): Regex flags to use. Defaults to 0.
@@ -176,15 +366,29 @@ def find_strings_within_ranges(
 
     """
 
-    return [
-        match.group(0) for match in find_within_ranges(
-            string,
-            pattern,
-            included_ranges,
-            count,
-            flags
-        )
-    ]
+    return [match.group(0) for match in _iter_within_ranges(string, pattern, included_ranges, count, flags)]
+
+
+def _iter_with_excluded_ranges(
+    string: str,
+    pattern: str | re.Pattern,
+    excluded_ranges: list[tuple[int, int]],
+    count: int = 0,
+    flags: int = 0
+) -> Iterator[re.Match]:
+    """Yield all occurrences of a pattern in a string, excluding specified ranges.
+
+    See ``find_with_excluded_ranges`` for a description of the arguments.
+
+    Yields:
+        re.Match: Each of the matches found outside the excluded ranges.
+
+    """
+
+    starts, ends = _prepare_ranges(excluded_ranges)
+    matches = _sweep_matches(_compile(pattern, flags).finditer(string), starts, ends, overlapping=False)
+
+    yield from islice(matches, count or None)
 
 
 def find_with_excluded_ranges(
@@ -198,7 +402,7 @@ def find_with_excluded_ranges(
 
     Args:
         string (str): The input string to search.
-        pattern (str): The regex pattern to search for.
+        pattern (str or re.Pattern): The regex pattern to search for, either as a string or pre-compiled.
         excluded_ranges (list of tuples): List of (start, end) tuples specifying ranges to exclude from searching.
         count (int, optional): Maximum number of pattern occurrences to find. Defaults to 0 (find all).
         flags (int, optional): Regex flags to use. Defaults to 0.
@@ -227,28 +431,7 @@ def find_with_excluded_ranges(
 
     """
 
-    matches = []
-    found = 0
-
-    excluded_ranges = _simplify_ranges(excluded_ranges)
-
-    for match in re.finditer(pattern, string, flags=flags):
-        if count and found >= count:
-            break
-
-        start, end = match.span()
-
-        overlap = False
-        for ex_start, ex_end in excluded_ranges:
-            if _do_ranges_overlap(start, end, ex_start, ex_end):
-                overlap = True
-                break
-
-        if not overlap:
-            matches.append(match)
-            found += 1
-
-    return matches
+    return list(_iter_with_excluded_ranges(string, pattern, excluded_ranges, count, flags))
 
 
 def find_strings_with_excluded_ranges(
@@ -262,7 +445,7 @@ def find_strings_with_excluded_ranges(
 
     Args:
         string (str): The input string to search.
-        pattern (str): The regex pattern to search for.
+        pattern (str or re.Pattern): The regex pattern to search for, either as a string or pre-compiled.
         excluded_ranges (list of tuples): List of (start, end) tuples specifying ranges to exclude from searching.
         count (int, optional): Maximum number of pattern occurrences to find. Defaults to 0 (find all).
         flags (int, optional): Regex flags to use. Defaults to 0.
@@ -290,15 +473,45 @@ def find_strings_with_excluded_ranges(
 
     """
 
-    return [
-        match.group(0) for match in find_with_excluded_ranges(
-            string,
-            pattern,
-            excluded_ranges,
-            count,
-            flags
-        )
-    ]
+    return [match.group(0) for match in _iter_with_excluded_ranges(string, pattern, excluded_ranges, count, flags)]
+
+
+def _iter_within_patterns(
+    string: str,
+    pattern: str | re.Pattern,
+    included_patterns: list[str],
+    count: int = 0,
+    flags: int = 0
+) -> Iterator[re.Match]:
+    """Yield all occurrences of a pattern in a string, only within specified patterns.
+
+    See ``find_within_patterns`` for a description of the arguments.
+
+    Yields:
+        re.Match: Each of the matches found within the included patterns.
+
+    """
+
+    found = 0
+
+    compiled = _compile(pattern, flags)
+
+    inc_spans = (
+        inc_match.span()
+        for inc_pattern in included_patterns
+        for inc_match in _compile(inc_pattern, flags).finditer(string)
+    )
+    if len(included_patterns) > 1:
+        # Sort the spans of the different patterns so the matches are yielded in string order,
+        # and search a span found by more than one pattern only once
+        inc_spans = sorted(set(inc_spans))
+
+    for start, end in inc_spans:
+        for match in compiled.finditer(string, start, end):
+            if count and found >= count:
+                return
+            yield match
+            found += 1
 
 
 def find_within_patterns(
@@ -310,50 +523,52 @@ def find_within_patterns(
 ) -> list[re.Match]:
     """Find all occurrences of a pattern in a string, only within specified patterns.
 
+    Each included match is searched separately, and matches are returned in the string order of the
+    included matches they were found in. An included match found by several included patterns is
+    searched only once, but included matches which only overlap are each searched, so a match in their
+    overlap is returned once for each of them.
+
+    The pattern is matched in place, limited to each included match like ``re.Pattern.finditer(string,
+    pos, endpos)``, rather than in a copy of the included text. The included match ends the searched
+    text, so ``$`` and ``\\b`` match at its end, but the text before it is still visible: ``^`` and
+    ``\\A`` only match at the start of ``string``, while ``\\b`` and lookbehinds see the characters
+    before the included match.
+
     Args:
         string (str): The input string to search.
-        pattern (str): The regex pattern to search for.
+        pattern (str or re.Pattern): The regex pattern to search for, either as a string or pre-compiled.
         included_patterns (list of str): List of regex patterns specifying matches to include for searching.
         count (int, optional): Maximum number of pattern occurrences to find. Defaults to 0 (find all).
         flags (int, optional): Regex flags to use. Defaults to 0.
 
     Returns:
-        list: A list of all matches found within the included patterns.
+        list: A list of all matches found within the included patterns. Match spans are relative to ``string``.
 
     Examples:
         >>> find_within_patterns('foo bar "foo"', r'foo', [r'"[^"]*"'])
-        [<re.Match object; span=(1, 4), match='foo'>]
+        [<re.Match object; span=(9, 12), match='foo'>]
 
         >>> find_within_patterns('abc 123 def "456"', r'\\d+', [r'"[^"]*"'])
-        [<re.Match object; span=(1, 4), match='456'>]
+        [<re.Match object; span=(13, 16), match='456'>]
 
         >>> find_within_patterns('hello world (goodbye)', r'\\w+', [r'\\(.*?\\)'])
-        [<re.Match object; span=(1, 8), match='goodbye'>]
+        [<re.Match object; span=(13, 20), match='goodbye'>]
 
         >>> find_within_patterns('foo bar (foo) [baz]', r'\\w+', [r'\\(.*?\\)', r'\\[.*?\\]'])
-        [<re.Match object; span=(1, 4), match='foo'>, <re.Match object; span=(1, 4), match='baz'>]
+        [<re.Match object; span=(9, 12), match='foo'>, <re.Match object; span=(15, 18), match='baz'>]
 
         >>> find_within_patterns('foo bar (foo) [baz]', r'\\w+', [r'\\(.*?\\)', r'\\[.*?\\]'], count=1)
-        [<re.Match object; span=(1, 4), match='foo'>]
+        [<re.Match object; span=(9, 12), match='foo'>]
 
         >>> find_within_patterns('world worldwide WORLD WORLDWIDE', r'\\w+', [r'worldwide'], flags=re.IGNORECASE)
-        [<re.Match object; span=(0, 9), match='worldwide'>, <re.Match object; span=(0, 9), match='WORLDWIDE'>]
+        [<re.Match object; span=(6, 15), match='worldwide'>, <re.Match object; span=(22, 31), match='WORLDWIDE'>]
 
-    """
-
-    matches = []
-    found = 0
+        >>> find_within_patterns('x foo bar', r'^\\w+', [r'foo bar'])
+        []
 
-    for inc_pattern in included_patterns:
-        for inc_match in re.finditer(inc_pattern, string, flags=flags):
-            start, end = inc_match.span()
-            for match in re.finditer(pattern, string[start:end], flags=flags):
-                if count and found >= count:
-                    break
-                matches.append(match)
-                found += 1
+    """
 
-    return matches
+    return list(_iter_within_patterns(string, pattern, included_patterns, count, flags))
 
 
 def find_strings_within_patterns(
@@ -367,7 +582,7 @@ def find_strings_within_patterns(
 
     Args:
         string (str): The input string to search.
-        pattern (str): The regex pattern to search for.
+        pattern (str or re.Pattern): The regex pattern to search for, either as a string or pre-compiled.
         included_patterns (list of str): List of regex patterns specifying matches to include for searching.
         count (int, optional): Maximum number of pattern occurrences to find. Defaults to 0 (find all).
         flags (int, optional): Regex flags to use. Defaults to 0.
@@ -396,16 +611,39 @@ def find_strings_within_patterns(
 
     """
 
-    return [
-        match.group(0) for match in find_within_patterns(
-            string,
-            pattern,
-            included_patterns,
-            count,
-            flags
-        )
+    return [match.group(0) for match in _iter_within_patterns(string, pattern, included_patterns, count, flags)]
+
+
+def _iter_with_excluded_patterns(
+    string: str,
+    pattern: str | re.Pattern,
+    excluded_patterns: list[str],
+    count: int = 0,
+    flags: int = 0
+) -> Iterator[re.Match]:
+    """Yield all occurrences of a pattern in a string, excluding matches within specified patterns.
+
+    See ``find_with_excluded_patterns`` for a description of the arguments.
+
+    Yields:
+        re.Match: Each of the matches found outside the excluded patterns.
+
+    """
+
+    # Each excluded pattern is searched on its own: an alternation keeps only one match per position,
+    # which would let through text matched by the other patterns
+    excluded_spans = [
+        ex_match.span()
+        for ex_pattern in excluded_patterns
+        for ex_match in _compile(ex_pattern, flags).finditer(string)
     ]
 
+    # Touching spans are kept apart: an empty match at their boundary overlaps neither of them
+    starts, ends = _prepare_ranges(excluded_spans, merge_contiguous=False)
+    matches = _sweep_matches(_compile(pattern, flags).finditer(string), starts, ends, overlapping=False)
+
+    yield from islice(matches, count or None)
+
 
 def find_with_excluded_patterns(
     string: str,
@@ -418,7 +656,7 @@ def find_with_excluded_patterns(
 
     Args:
         string (str): The input string to search.
-        pattern (str): The regex pattern to search for.
+        pattern (str or re.Pattern): The regex pattern to search for, either as a string or pre-compiled.
         excluded_patterns (list of str): List of regex patterns specifying matches to exclude from searching.
         count (int, optional): Maximum number of pattern occurrences to find. Defaults to 0 (find all).
         flags (int, optional): Regex flags to use. Defaults to 0.
@@ -447,31 +685,7 @@ def find_with_excluded_patterns(
 
     """
 
-    matches = []
-    found = 0
-
-    excluded_spans = []
-    for ex_pattern in excluded_patterns:
-        for ex_match in re.finditer(ex_pattern, string, flags=flags):
-            excluded_spans.append(ex_match.span())
-
-    for match in re.finditer(pattern, string, flags=flags):
-        if count and found >= count:
-            break
-
-        start, end = match.span()
-
-        overlap = False
-        for ex_start, ex_end in excluded_spans:
-            if _do_ranges_overlap(start, end, ex_start, ex_end):
-                overlap = True
-                break
-
-        if not overlap:
-            matches.append(match)
-            found += 1
-
-    return matches
+    return list(_iter_with_excluded_patterns(string, pattern, excluded_patterns, count, flags))
 
 
 def find_strings_with_excluded_patterns(
@@ -485,7 +699,7 @@ def find_strings_with_excluded_patterns(
 
     Args:
         string (str): The input string to search.
-        pattern (str): The regex pattern to search for.
+        pattern (str or re.Pattern): The regex pattern to search for, either as a string or pre-compiled.
         excluded_patterns (list of str): List of regex patterns specifying matches to exclude from searching.
         count (int, optional): Maximum number of pattern occurrences to find. Defaults to 0 (find all).
         flags (int, optional): Regex flags to use. Defaults to 0.
@@ -514,15 +728,7 @@ def find_strings_with_excluded_patterns(
 
     """
 
-    return [
-        match.group(0) for match in find_with_excluded_patterns(
-            string,
-            pattern,
-            excluded_patterns,
-            count,
-            flags
-        )
-    ]
+    return [match.group(0) for match in _iter_with_excluded_patterns(string, pattern, excluded_patterns, count, flags)]
 
 
 def replace_within_ranges(
@@ -537,7 +743,7 @@ def replace_within_ranges(
 
     Args:
         string (str): The input string to perform replacements on.
-        pattern (str): The regex pattern to search for.
+        pattern (str or re.Pattern): The regex pattern to search for, either as a string or pre-compiled.
         replacement (str): The string to replace the matched patterns with.
         included_ranges (list of tuples): List of (start, end) tuples specifying ranges to include for replacement.
         count (int, optional): Maximum number of pattern occurrences to replace. Defaults to 0 (replace all).
@@ -570,14 +776,33 @@ def replace_within_ranges(
 
     """
 
-    def replacement_function(match):
-        start, end = match.span()
-        for in_start, in_end in included_ranges:
-            if _do_ranges_overlap(start, end, in_start, in_end):
-                return replacement
-        return match.group(0)
+    if not included_ranges:
+        return string
+
+    compiled = _compile(pattern, flags)
+    # Touching ranges are kept apart: an empty match at their boundary overlaps neither of them
+    starts, ends = _prepare_ranges(included_ranges, merge_contiguous=False)
+
+    if _covers_all_matches(compiled, string, starts, ends):
+        # Every match is replaced, so let `re` insert the (escaped) literal without a Python callback
+        return compiled.sub(_escape_replacement(replacement), string, count=count)
+
+    parts = []
+    position = 0
+
+    # `count` limits the matches looked at, not only the ones replaced, so it is applied before filtering.
+    # Only the matches to replace reach the loop, the text around them is copied in slices.
+    matches = _sweep_matches(islice(compiled.finditer(string), count or None), starts, ends)
 
-    return re.sub(pattern, replacement_function, string, count=count, flags=flags)
+    for match in matches:
+        parts.append(string[position:match.start()])
+        parts.append(replacement)
+        position = match.end()
+
+    parts.append(string[position:])
+
+    # Join with an empty slice of the input, so bytes strings are joined as bytes
+    return string[:0].join(parts)
 
 
 def replace_with_excluded_ranges(
@@ -592,7 +817,7 @@ def replace_with_excluded_ranges(
 
     Args:
         string (str): The input string to perform replacements on.
-        pattern (str): The regex pattern to search for.
+        pattern (str or re.Pattern): The regex pattern to search for, either as a string or pre-compiled.
         replacement (str): The string to replace the matched patterns with.
         excluded_ranges (list of tuples): List of (start, end) tuples specifying ranges to exclude from replacement.
         count (int, optional): Maximum number of pattern occurrences to replace. Defaults to 0 (replace all).
@@ -622,23 +847,31 @@ def replace_with_excluded_ranges(
 
     """
 
-    replaced = 0
+    compiled = _compile(pattern, flags)
+
+    if not excluded_ranges:
+        return compiled.sub(_escape_replacement(replacement), string, count=count)
+
+    # Touching ranges are kept apart: an empty match at their boundary overlaps neither of them
+    starts, ends = _prepare_ranges(excluded_ranges, merge_contiguous=False)
+
+    if _covers_all_matches(compiled, string, starts, ends):
+        return string
 
-    def replacement_function(match):
-        nonlocal replaced
+    parts = []
+    position = 0
 
-        if count and replaced >= count:
-            return match.group(0)
+    # Drive `finditer` directly instead of `sub`, so the search stops as soon as `count` replacements are made
+    matches = _sweep_matches(compiled.finditer(string), starts, ends, overlapping=False)
 
-        start, end = match.span()
-        for ex_start, ex_end in excluded_ranges:
-            if _do_ranges_overlap(start, end, ex_start, ex_end):
-                return match.group(0)
+    for match in islice(matches, count or None):
+        parts.append(string[position:match.start()])
+        parts.append(replacement)
+        position = match.end()
 
-        replaced += 1
-        return replacement
+    parts.append(string[position:])
 
-    return re.sub(pattern, replacement_function, string, flags=flags)
+    return string[:0].join(parts)
 
 
 if __name__ == "__main__":
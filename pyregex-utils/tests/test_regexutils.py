@@ -1,11 +1,24 @@
+import importlib
+import re
+import sys
+import types
+
 import pytest
 
+import src.regexutils
 from src.regexutils import (
+    _compile,
     _do_ranges_overlap,
+    _prepare_ranges,
+    _sweep_matches,
     find_within_ranges,
     find_strings_within_ranges,
     find_with_excluded_ranges,
     find_strings_with_excluded_ranges,
+    find_within_patterns,
+    find_strings_with_excluded_patterns,
+    replace_within_ranges,
+    replace_with_excluded_ranges,
 )
 
 
@@ -25,6 +38,27 @@ def test_ranges_overlap(start1, end1, start2, end2, expected):
     assert _do_ranges_overlap(start1, end1, start2, end2) == expected
 
 
+@pytest.mark.parametrize(
+    "start, end, ranges, expected",
+    [
+        (0, 5, [(3, 7)], True),  # Overlapping range
+        (0, 2, [(3, 5)], False),  # Range after
+        (6, 8, [(3, 5)], False),  # Range before
+        (4, 6, [(8, 10), (1, 5)], True),  # Unsorted ranges
+        (5, 8, [(1, 5), (8, 10)], False),  # Between ranges
+        (6, 7, [(1, 3), (2, 9)], True),  # Overlapping ranges merged
+        (4, 5, [(4, 5), (4, 4)], True),  # Empty range sharing a start
+        (2, 4, [(-1, 3), (-1, -1)], True),  # Empty range before a range
+        (0, 5, [], False),  # No ranges
+    ]
+)
+def test_sweep_matches(start, end, ranges, expected):
+    match = re.compile(f".{{{end - start}}}", re.DOTALL).match(" " * end, start)
+    starts, ends = _prepare_ranges(ranges)
+    assert list(_sweep_matches([match], starts, ends)) == ([match] if expected else [])
+    assert list(_sweep_matches([match], starts, ends, overlapping=False)) == ([] if expected else [match])
+
+
 @pytest.mark.parametrize(
     "text, pattern, ranges, expected_spans",
     [
@@ -159,3 +193,144 @@ def test_find_with_excluded_ranges(text, pattern, excluded_ranges, expected_span
 def test_find_strings_with_excluded_ranges(text, pattern, excluded_ranges, expected_matches):
     matches = find_strings_with_excluded_ranges(text, pattern, excluded_ranges)
     assert matches == expected_matches
+
+
+def test_find_within_ranges_compiled_pattern():
+    compiled = re.compile(r'\b\w{3}\b', re.IGNORECASE)
+    matches = find_strings_within_ranges("The quick brown fox jumps over the lazy dog", compiled, [(0, 10), (20, 40)])
+    assert matches == ['The', 'the']
+
+
+def test_find_within_ranges_bytes_pattern():
+    matches = find_strings_within_ranges(b'foo bar', rb'\w+', [(0, 3)])
+    assert matches == [b'foo']
+
+
+def test_find_within_patterns_spans():
+    text = 'say "hello world" and "bye"'
+    matches = find_within_patterns(text, r'\w+', [r'"[^"]*"'])
+    assert [match.span() for match in matches] == [(5, 10), (11, 16), (23, 26)]
+    assert [match.group(0) for match in matches] == ['hello', 'world', 'bye']
+
+
+@pytest.mark.parametrize(
+    "text, pattern, replacement, ranges, expected",
+    [
+        ("foo bar", r'\w+', 'X', [], "foo bar"),  # No ranges
+        ("foo bar", r'\w+', 'X', [(0, 7)], "X X"),  # Ranges cover the whole string
+        ("foo bar", r'\w+', r'\1', [(0, 7)], r"\1 \1"),  # Replacement is inserted literally
+        ("foo bar", r'\w*', 'X', [(0, 7)], "XX X"),  # Empty matches at the string edges
+        (b"foo bar", rb'\w+', b'X', [], b"foo bar"),  # Bytes string
+        (b"foo bar", rb'\w+', rb'\1', [(0, 7)], rb"\1 \1"),
+        (b"foo bar", rb'\w+', b'X', [(0, 3)], b"X bar"),
+        ("xax bba", r'x|', 'R', [(0, 1), (1, 7), (7, 8)], "RaRR RbRbRa"),  # Empty matches between touching ranges
+    ]
+)
+def test_replace_within_ranges(text, pattern, replacement, ranges, expected):
+    assert replace_within_ranges(text, pattern, replacement, ranges) == expected
+
+
+@pytest.mark.parametrize(
+    "text, pattern, replacement, ranges, expected",
+    [
+        ("foo bar", r'\w+', 'X', [], "X X"),  # No ranges
+        ("foo bar", r'\w+', r'\1', [], r"\1 \1"),  # Replacement is inserted literally
+        ("foo bar", r'\w+', 'X', [(0, 7)], "foo bar"),  # Ranges cover the whole string
+        ("foo bar", r'\w*', 'X', [(0, 7)], "foo barX"),  # Empty matches at the string edges
+        (b"foo bar", rb'\w+', rb'\1', [], rb"\1 \1"),  # Bytes string
+        (b"foo bar", rb'\w+', b'X', [(0, 7)], b"foo bar"),
+        (b"foo bar", rb'\w+', b'X', [(0, 3)], b"foo X"),
+        ("xax bba", r'x|', 'R', [(0, 1), (1, 7)], "xRax bbaR"),  # Empty matches between touching ranges
+    ]
+)
+def test_replace_with_excluded_ranges(text, pattern, replacement, ranges, expected):
+    assert replace_with_excluded_ranges(text, pattern, replacement, ranges) == expected
+
+
+@pytest.mark.parametrize(
+    "text, pattern, included_patterns, count, expected_matches",
+    [
+        ('[a] (b) [c]', r'\w', [r'\(.*?\)', r'\[.*?\]'], 0, ['a', 'b', 'c']),  # Matches in string order
+        ('aa [b] aa', r'\w', [r'\[.*?\]', r'(a)\1'], 0, ['a', 'a', 'b', 'a', 'a']),  # Patterns with groups
+        ('aa [b] aa', r'\w', [r'\[.*?\]', r'(a)\1'], 2, ['a', 'a']),  # Count reached in the first span
+        ('[a] [bc] [d]', r'\w', [r'\[.*?\]'], 2, ['a', 'b']),  # Count reached in a later span
+        ('[a b]', r'\w', [r'\[.*?\]', r'\[a'], 0, ['a', 'a', 'b']),  # Overlapping included matches
+        ('ab', r'\w', [r'a', r'ab'], 0, ['a', 'a', 'b']),
+        ('ab', r'\w', [r'(a)', r'ab'], 0, ['a', 'a', 'b']),
+        ('[a] [a]', r'\w', [r'\[a\]', r'\[.\]'], 0, ['a', 'a']),  # Included match found by several patterns
+    ]
+)
+def test_find_within_patterns_order(text, pattern, included_patterns, count, expected_matches):
+    matches = find_within_patterns(text, pattern, included_patterns, count)
+    assert [match.group(0) for match in matches] == expected_matches
+
+
+@pytest.mark.parametrize(
+    "text, pattern, included_patterns, expected_matches",
+    [
+        ('x foo bar', r'^\w+', [r'foo bar'], []),  # `^` only matches at the start of the string
+        ('foo bar', r'^\w+', [r'foo bar'], ['foo']),
+        ('xfoo', r'\bfoo', [r'foo'], []),  # `\b` sees the text before the included match
+        ('foox', r'foo\b', [r'foo'], ['foo']),  # The included match ends the searched text
+        ('xfoo', r'(?<=x)foo', [r'foo'], ['foo']),  # Lookbehinds see the text before the included match
+    ]
+)
+def test_find_within_patterns_in_place(text, pattern, included_patterns, expected_matches):
+    matches = find_within_patterns(text, pattern, included_patterns)
+    assert [match.group(0) for match in matches] == expected_matches
+
+
+@pytest.mark.parametrize(
+    "text, pattern, excluded_patterns, expected_matches",
+    [
+        ('a b', r'\w+', [r'a', r'a b'], []),  # Excluded matches starting at the same position
+        ('a b', r'\w+', [r'a b', r'a'], []),
+        ('a b', r'\w+', [r'(a)', r'a b'], []),  # Patterns with groups
+        ('x "b \'c" d\' e', r'\w+', [r'"[^"]*"', r"'[^']*'"], ['x', 'e']),  # Overlapping excluded matches
+        ('ab', r'x|', [r'a', r'b'], ['', '', '']),  # Empty matches between touching excluded matches
+    ]
+)
+def test_find_with_excluded_patterns_overlapping(text, pattern, excluded_patterns, expected_matches):
+    assert find_strings_with_excluded_patterns(text, pattern, excluded_patterns) == expected_matches
+
+
+@pytest.fixture
+def reload_regexutils(monkeypatch):
+    # Reload the module with another backend, and restore the default one after the test
+    def reload(backend):
+        monkeypatch.setenv("REGEXUTILS_BACKEND", backend)
+        return importlib.reload(src.regexutils)
+
+    yield reload
+
+    monkeypatch.delenv("REGEXUTILS_BACKEND", raising=False)
+    importlib.reload(src.regexutils)
+
+
+def test_regex_backend(monkeypatch, reload_regexutils):
+    compiled_patterns = []
+
+    def compile(pattern, flags=0):
+        compiled_patterns.append(pattern)
+        return re.compile(pattern, flags)
+
+    backend = types.ModuleType("fake_regex_backend")
+    backend.compile = compile
+    monkeypatch.setitem(sys.modules, "fake_regex_backend", backend)
+
+    regexutils = reload_regexutils("fake_regex_backend")
+
+    assert regexutils._backend is backend
+    assert regexutils._compile(r'foo') == re.compile(r'foo')
+    assert regexutils.find_strings_within_ranges('foo bar', r'\w+', [(0, 3)]) == ['foo']
+    assert compiled_patterns == [r'foo', r'\w+']
+
+
+def test_regex_backend_unknown(reload_regexutils):
+    with pytest.raises(ImportError, match="'no_such_regex_backend' set in REGEXUTILS_BACKEND"):
+        reload_regexutils("no_such_regex_backend")
+
+
+def test_regex_backend_default():
+    assert src.regexutils._backend is re
+    assert _compile(r'foo') == re.compile(r'foo')
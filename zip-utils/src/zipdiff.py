@@ -1,6 +1,7 @@
 """This module provides utilities for comparing the contents of two zip files."""
 
 import difflib
+import os
 import zipfile
 from pathlib import Path
 from typing import Union
@@ -39,8 +40,8 @@ def zip_content_diff(zip1_path: Union[str, Path], zip2_path: Union[str, Path]):
     """
 
     diff = {}
-    zip1_name = Path(zip1_path).name
-    zip2_name = Path(zip2_path).name
+    zip1_name = os.path.basename(zip1_path)
+    zip2_name = os.path.basename(zip2_path)
 
     with zipfile.ZipFile(zip1_path, 'r') as zip1, zipfile.ZipFile(zip2_path, 'r') as zip2:
         zip1_files = set(zip1.namelist())
@@ -48,7 +49,14 @@ def zip_content_diff(zip1_path: Union[str, Path], zip2_path: Union[str, Path]):
         common_files = zip1_files & zip2_files
 
         for file in common_files:
-            with zip1.open(file) as f1, zip2.open(file) as f2:
+            info1 = zip1.getinfo(file)
+            info2 = zip2.getinfo(file)
+
+            # Entries with the same size and CRC-32 are taken to be identical, without reading them
+            if info1.CRC == info2.CRC and info1.file_size == info2.file_size:
+                continue
+
+            with zip1.open(info1) as f1, zip2.open(info2) as f2:
                 content1 = f1.read().decode(errors="replace").splitlines()
                 content2 = f2.read().decode(errors="replace").splitlines()
 
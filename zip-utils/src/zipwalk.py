@@ -1,10 +1,48 @@
 """A python script that walks through a zip file similar to the ``os.walk()`` function."""
 
 import os
+import sys
 import zipfile
 from itertools import islice
 from pathlib import Path
-from typing import Optional, Union
+from typing import Iterable, Optional, Union
+
+
+def _zip_index(names: Iterable[str]) -> dict[str, tuple[set[str], set[str]]]:
+    """Index the entries of a zip file by the directory that contains them, in a single pass.
+
+    Directories without an entry of their own (e.g. ``a/`` for a zip that only contains ``a/file.txt``)
+    are indexed as well.
+
+    Args:
+        names (iterable of str): Names of the entries in the zip file.
+
+    Returns:
+        dict: A dictionary mapping each directory path inside the zip file (``""`` for the root directory)
+            to a tuple (dirnames, filenames) where:
+            - ``dirnames`` is a set of directory names in the directory.
+            - ``filenames`` is a set of file names in the directory.
+
+    """
+
+    index = {"": (set(), set())}
+
+    def entry(dirpath: str) -> tuple[set[str], set[str]]:
+        if dirpath not in index:
+            index[dirpath] = (set(), set())
+            parent, _, dirname = dirpath.rpartition("/")
+            entry(parent)[0].add(dirname)
+
+        return index[dirpath]
+
+    for name in names:
+        if name.endswith("/"):
+            entry(name.rstrip("/"))
+        else:
+            parent, _, filename = name.rpartition("/")
+            entry(parent)[1].add(filename)
+
+    return index
 
 
 def zip_content(zip_path: Union[str, Path], path: Optional[Union[str, Path]] = None):
@@ -22,22 +60,15 @@ def zip_content(zip_path: Union[str, Path], path: Optional[Union[str, Path]] = N
 
     """
 
-    with zipfile.ZipFile(zip_path, "r") as zf:
-        if path is None:
-            path = ""
-
-        normalized_parent = path if path else "."
-
-        all_names = zf.infolist()
-        all_names = {item for item in all_names if str(Path(item.filename).parent) == normalized_parent}
+    # Names inside a zip file always use forward slashes, so plain string operations are enough
+    normalized_parent = str(path).strip("/") if path is not None else ""
+    if normalized_parent == ".":
+        normalized_parent = ""
 
-        all_dirnames = {item.filename for item in all_names if item.is_dir()}
-        all_filenames = {item.filename for item in all_names if not item.is_dir()}
-
-        dirnames = {Path(name).name for name in all_dirnames if name != path}
-        filenames = {Path(name).name for name in all_filenames if name != path}
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        index = _zip_index(zf.namelist())
 
-        return dirnames, filenames
+    return index.get(normalized_parent, (set(), set()))
 
 
 def zip_walk(zip_path: Union[str, Path]):
@@ -55,24 +86,12 @@ def zip_walk(zip_path: Union[str, Path]):
     """
 
     with zipfile.ZipFile(zip_path, 'r') as zf:
-        all_names = zf.namelist()
-
-        all_dirnames = {os.path.dirname(f) for f in all_names if f.endswith('/')}
-        all_dirnames = sorted(all_dirnames)
+        index = _zip_index(zf.namelist())
 
-        all_filenames = {f for f in all_names if not f.endswith('/')}
-        all_filenames = sorted(all_filenames)
+    yield "/", *index.pop("")
 
-        yield "/", {d for d in all_dirnames if d != "/"}, {f for f in all_filenames if not os.path.dirname(f)}
-
-        for dirpath in all_dirnames:
-            if dirpath == "/":
-                continue
-
-            dirnames = {os.path.basename(d) for d in all_dirnames if os.path.dirname(d) == dirpath}
-            filenames = {os.path.basename(f) for f in all_filenames if os.path.dirname(f) == dirpath}
-
-            yield dirpath, dirnames, filenames
+    for dirpath in sorted(index):
+        yield dirpath, *index[dirpath]
 
 
 def zip_tree(zip_path: Union[str, Path], level: int = -1, dirs_only: bool = False, length_limit: int = 1000):
@@ -97,41 +116,50 @@ def zip_tree(zip_path: Union[str, Path], level: int = -1, dirs_only: bool = Fals
     file_count = 0
     dir_count = 0
 
-    def inner(zip_path: Path, path: Optional[Path] = None, prefix: str = '', level=-1):
+    def inner(index: dict[str, tuple[set[str], set[str]]], path: str = '', prefix: str = '', level=-1):
         nonlocal file_count, dir_count
 
         if not level:
             return
 
-        inner_dirs, inner_files = zip_content(zip_path, path=path)
+        inner_dirs, inner_files = index.get(path, (set(), set()))
 
-        contents = {(inner_dir_path, True) for inner_dir_path in inner_dirs}
+        # Sort the entries of each directory once, when it is visited, so the tree is printed in a stable order
+        contents = [(inner_dir_path, True) for inner_dir_path in inner_dirs]
         if not dirs_only:
-            contents |= {(inner_file_path, False) for inner_file_path in inner_files}
+            contents += [(inner_file_path, False) for inner_file_path in inner_files]
+        contents.sort()
 
-        # Create a list of pointers for tree visualization:
+        # Pick the pointer for tree visualization:
         # - Use `tee` for all items except the last one.
         # - Use `last` for the final item to indicate the end of a branch.
-        pointers = [tee] * (len(contents) - 1) + [last]
+        last_index = len(contents) - 1
 
-        for pointer, (current_path, is_dir) in zip(pointers, contents):
+        for index_in_dir, (current_path, is_dir) in enumerate(contents):
+            pointer = last if index_in_dir == last_index else tee
             if is_dir:
                 yield prefix + pointer + current_path
                 dir_count += 1
                 extension = branch if pointer == tee else space
-                yield from inner(zip_path, current_path, prefix=prefix+extension, level=level-1)
+                child_path = f"{path}/{current_path}" if path else current_path
+                yield from inner(index, child_path, prefix=prefix+extension, level=level-1)
             elif not dirs_only:
                 file_count += 1
                 yield prefix + pointer + current_path
 
-    zip_path = Path(zip_path)
-    print(zip_path.name)
+    # Open the zip file and index its entries once, instead of once per directory
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        index = _zip_index(zf.namelist())
+
+    # Collect the output and write it at once, instead of one `print` call per line
+    lines = [os.path.basename(zip_path)]
 
-    iterator = inner(zip_path, path=None, level=level)
-    for line in islice(iterator, length_limit):
-        print(line)
+    iterator = inner(index, level=level)
+    lines.extend(islice(iterator, length_limit))
 
     if next(iterator, None):
-        print(f'... length_limit, {length_limit}, reached, counted:')
+        lines.append(f'... length_limit, {length_limit}, reached, counted:')
+
+    lines.append(f"\n{dir_count} directories" + (f", {file_count} files" if file_count else ''))
 
-    print(f"\n{dir_count} directories" + (f", {file_count} files" if file_count else ''))
+    sys.stdout.write("\n".join(lines) + "\n")
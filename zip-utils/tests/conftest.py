@@ -7,17 +7,22 @@ def create_test_zip(tmp_path, content, zipfile_name="test.zip"):
 
     zip_path = tmp_path / zipfile_name
 
+    # Track the created directories, `zf.namelist()` builds a new list on every call
+    created_dirs = set()
+
     with zipfile.ZipFile(zip_path, 'w') as zf:
         for item_path, item_content in content:
             item_path = Path(item_path)
 
             if item_path.is_dir():
                 zf.mkdir(item_path)
+                created_dirs.add(str(item_path))
                 continue
 
             item_parent = str(item_path.parent)
-            if item_parent and item_parent != "." and f"{item_parent}/" not in zf.namelist():
+            if item_parent and item_parent != "." and item_parent not in created_dirs:
                 zf.mkdir(item_parent)
+                created_dirs.add(item_parent)
 
             zf.writestr(str(item_path), item_content)
 
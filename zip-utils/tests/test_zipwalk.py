@@ -1,6 +1,7 @@
 import io
 import zipfile
 from contextlib import redirect_stdout
+from pathlib import Path
 
 import pytest
 
@@ -65,6 +66,36 @@ def test_zip_content_subdirectory(tmp_path):
     assert filenames == {"file2.txt", "file3.txt"}
 
 
+@pytest.mark.parametrize("path", ["dir1/dir2", "dir1/dir2/", Path("dir1/dir2")])
+def test_zip_content_nested_subdirectory(tmp_path, path):
+    """Test zip_content for a nested subdirectory given in different forms."""
+
+    content = [
+        ("dir1/file1.txt", "This is file 1"),
+        ("dir1/dir2/file2.txt", "This is file 2"),
+        ("dir1/dir2/dir3/file3.txt", "This is file 3"),
+    ]
+    zip_path = create_test_zip(tmp_path, content=content)
+
+    dirnames, filenames = zip_content(zip_path, path=path)
+
+    assert dirnames == {"dir3"}
+    assert filenames == {"file2.txt"}
+
+
+def test_zip_content_without_directory_entries(tmp_path):
+    """Test zip_content for a zip file that has no entries for its directories."""
+
+    zip_path = tmp_path / "test.zip"
+
+    with zipfile.ZipFile(zip_path, 'w') as zf:
+        zf.writestr("dir1/dir2/file1.txt", "This is file 1")
+
+    assert zip_content(zip_path) == ({"dir1"}, set())
+    assert zip_content(zip_path, path="dir1") == ({"dir2"}, set())
+    assert zip_content(zip_path, path="dir1/dir2") == (set(), {"file1.txt"})
+
+
 def test_zip_content_empty_directory(tmp_path):
     """Test zip_content for an empty directory."""
 
@@ -112,6 +143,41 @@ def test_zip_walk_flat_structure(tmp_path):
     ]
 
 
+def test_zip_walk_nested_structure(tmp_path):
+    """Test zip_walk with a nested structure."""
+
+    zip_path = create_test_zip(tmp_path, content=ZIP_NESTED_CONTENT)
+
+    result = list(zip_walk(zip_path))
+
+    assert result == [
+        ("/", {"A", "B", "C", "E"}, {"file_0.txt", "file_1.txt", "file_2.txt"}),
+        ("A", set(), {"file_3.txt", "file_4.txt"}),
+        ("B", set(), {"file_5.txt"}),
+        ("C", {"D"}, {"file_6.txt"}),
+        ("C/D", set(), {"file_7.txt"}),
+        ("E", {"F"}, set()),
+        ("E/F", set(), {"G"}),
+    ]
+
+
+def test_zip_walk_without_directory_entries(tmp_path):
+    """Test zip_walk with a zip file that has no entries for its directories."""
+
+    zip_path = tmp_path / "test.zip"
+
+    with zipfile.ZipFile(zip_path, 'w') as zf:
+        zf.writestr("A/B/file_0.txt", "0")
+
+    result = list(zip_walk(zip_path))
+
+    assert result == [
+        ("/", {"A"}, set()),
+        ("A", {"B"}, set()),
+        ("A/B", set(), {"file_0.txt"}),
+    ]
+
+
 def test_zip_walk_empty_zip(tmp_path):
     """Test zip_walk with an empty zip file."""
 
@@ -159,3 +225,33 @@ def test_zip_tree_subdirectory(tmp_path):
 
     assert result.startswith("test.zip\n")
     assert result.endswith("2 directories, 4 files")
+
+
+def test_zip_tree_nested(tmp_path):
+    zip_path = create_test_zip(tmp_path, content=ZIP_NESTED_CONTENT)
+
+    f = io.StringIO()
+    with redirect_stdout(f):
+        zip_tree(zip_path)
+    result = f.getvalue().strip()
+
+    assert result == "\n".join([
+        "test.zip",
+        "├── A",
+        "│   ├── file_3.txt",
+        "│   └── file_4.txt",
+        "├── B",
+        "│   └── file_5.txt",
+        "├── C",
+        "│   ├── D",
+        "│   │   └── file_7.txt",
+        "│   └── file_6.txt",
+        "├── E",
+        "│   └── F",
+        "│       └── G",
+        "├── file_0.txt",
+        "├── file_1.txt",
+        "└── file_2.txt",
+        "",
+        "6 directories, 9 files",
+    ])